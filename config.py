@@ -12,7 +12,7 @@ from pathlib import Path
 # Project root (same directory as this file)
 BASE_DIR = Path(__file__).resolve().parent
 
-# Staging area: raw CSVs written by generators before they hit the datalake
+# Debug copies of generator batches (only written when WRITE_LOCAL_OUTPUT is on)
 LOCAL_OUTPUT_DIR = BASE_DIR / "local_output"
 
 # Main data lake store (Bronze / Silver / Gold layers)
@@ -35,6 +35,10 @@ SALES_ROWS_PER_BATCH = 10          # rows per generator run
 CUSTOMER_EVENTS_ROWS_PER_BATCH = 15
 INVENTORY_ROWS_PER_BATCH = 8
 
+# Generators write straight into Bronze; set True to also keep a copy of
+# every batch under local_output/<domain>/ for debugging
+WRITE_LOCAL_OUTPUT = False
+
 # ---------------------------------------------------------------------------
 # Airflow schedule (informational — referenced in the DAG file)
 # ---------------------------------------------------------------------------
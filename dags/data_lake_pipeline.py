@@ -3,11 +3,9 @@ dags/data_lake_pipeline.py
 Apache Airflow DAG — Data Lake Medallion Architecture Pipeline
 
 DAG 1: data_lake_generator_dag  (schedule: every 5 min)
-  Runs all 3 generators in parallel, then uploads each result to Bronze.
+  Runs all 3 generators concurrently inside a single task, each writing to Bronze.
   Tasks:
-    generate_sales
-    generate_customer_events
-    generate_inventory
+    generate_all
 
 DAG 2: data_lake_pipeline_dag   (schedule: every 30 min)
   After generators have had time to accumulate data, transforms Bronze→Silver→Gold.
@@ -18,11 +16,18 @@ Both DAGs are defined in this single file for easy discovery by Airflow.
 """
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 from airflow import DAG
 from airflow.providers.standard.operators.python import PythonOperator
 
+from generator.customer_events_generator import run as run_events
+from generator.inventory_generator import run as run_inventory
+from generator.sales_generator import run as run_sales
+from pipeline.bronze_to_silver import run as run_bronze_to_silver
+from pipeline.silver_to_gold import run as run_silver_to_gold
+
 # ---------------------------------------------------------------------------
 # Default task arguments  (applied to every operator unless overridden)
 # ---------------------------------------------------------------------------
@@ -38,6 +43,19 @@ DEFAULT_ARGS = {
 
 logger = logging.getLogger(__name__)
 
+GENERATORS = [run_sales, run_events, run_inventory]
+
+
+def run_all_generators() -> None:
+    """
+    Run every generator concurrently within one Airflow task.
+    Any generator failure is re-raised so the task (and its retries) fail visibly.
+    """
+    with ThreadPoolExecutor(max_workers=len(GENERATORS)) as pool:
+        futures = [pool.submit(gen) for gen in GENERATORS]
+    for future in futures:
+        future.result()
+
 
 # ---------------------------------------------------------------------------
 # DAG 1 — Generator DAG  (every 5 minutes)
@@ -54,51 +72,21 @@ with DAG(
     tags=["datalake", "bronze", "generator"],
 ) as generator_dag:
 
-    # ---- Sales ----
-    from generator.sales_generator import run as run_sales
-
-    t_sales = PythonOperator(
-        task_id="generate_sales",
-        python_callable=run_sales,
+    # One task for all 3 generators — at 10–15 rows per batch the task
+    # dispatch overhead dwarfs the work, so three tasks buy nothing
+    t_generate = PythonOperator(
+        task_id="generate_all",
+        python_callable=run_all_generators,
         do_xcom_push=False,
         doc_md="""
-        Generates 10 synthetic e-commerce sales rows (fact_sales),
-        writes a CSV to local_output/sales/, then copies it to
-        datalake/bronze/sales/year=.../month=.../day=.../
+        Runs the 3 generators concurrently in one task, each writing a
+        Parquet batch straight into datalake/bronze/<domain>/year=.../month=.../day=.../
+          - sales:           10 e-commerce sales rows (fact_sales)
+          - customer_events: 15 clickstream event rows (fact_customer_events)
+          - inventory:       8 warehouse movement rows (fact_inventory_movements)
         """,
     )
 
-    # ---- Customer Events ----
-    from generator.customer_events_generator import run as run_events
-
-    t_events = PythonOperator(
-        task_id="generate_customer_events",
-        python_callable=run_events,
-        do_xcom_push=False,
-        doc_md="""
-        Generates 15 synthetic clickstream event rows (fact_customer_events),
-        writes a CSV to local_output/customer_events/, then copies it to
-        datalake/bronze/customer_events/year=.../month=.../day=.../
-        """,
-    )
-
-    # ---- Inventory ----
-    from generator.inventory_generator import run as run_inventory
-
-    t_inventory = PythonOperator(
-        task_id="generate_inventory",
-        python_callable=run_inventory,
-        do_xcom_push=False,
-        doc_md="""
-        Generates 8 synthetic warehouse movement rows (fact_inventory_movements),
-        writes a CSV to local_output/inventory/, then copies it to
-        datalake/bronze/inventory/year=.../month=.../day=.../
-        """,
-    )
-
-    # All 3 generators run in parallel (no inter-dependency)
-    [t_sales, t_events, t_inventory]
-
 
 # ---------------------------------------------------------------------------
 # DAG 2 — Pipeline DAG  (every 30 minutes)
@@ -115,15 +103,12 @@ with DAG(
     tags=["datalake", "silver", "gold", "pipeline"],
 ) as pipeline_dag:
 
-    from pipeline.bronze_to_silver import run as run_bronze_to_silver
-    from pipeline.silver_to_gold   import run as run_silver_to_gold
-
     t_silver = PythonOperator(
         task_id="bronze_to_silver",
         python_callable=run_bronze_to_silver,
         do_xcom_push=False,
         doc_md="""
-        Reads all unprocessed Bronze CSVs for every domain.
+        Reads all unprocessed Bronze Parquet files for every domain.
         Applies domain-specific cleaning:
           - sales:           dedup, null checks, fix total_amount
           - customer_events: dedup, null checks, validate event_type enum
@@ -0,0 +1,19 @@
+"""
+generator/_ids.py
+Batched random identifiers shared by the generators.
+"""
+
+import os
+
+import numpy as np
+
+
+def random_hex_ids(n: int) -> np.ndarray:
+    """
+    Return ``n`` random 128-bit ids as 32-char hex strings.
+
+    One os.urandom call fills the whole batch; the hex text is then sliced
+    into fixed-width ids by NumPy instead of building a UUID object per row.
+    """
+    hexed = os.urandom(16 * n).hex().encode("ascii")
+    return np.frombuffer(hexed, dtype="S32").astype(str)
@@ -13,19 +13,18 @@ Intentional data-quality issues:
 """
 
 import logging
-import random
-import uuid
-from datetime import datetime, timedelta, timezone
+import time
+from datetime import datetime, timezone
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
-from faker import Faker
 
-from config import LOCAL_OUTPUT_DIR, CUSTOMER_EVENTS_ROWS_PER_BATCH
-from storage.local_storage import save_to_bronze
+from config import CUSTOMER_EVENTS_ROWS_PER_BATCH
+from generator._ids import random_hex_ids
+from storage.local_storage import write_to_bronze
 
 logger = logging.getLogger(__name__)
-fake = Faker()
 
 # --------------------------------------------------------------------------
 # Reference data
@@ -39,33 +38,47 @@ PAGES = [
 ]
 PRODUCT_IDS = [f"PROD-{i}" for i in range(100, 200)]
 
+# Bronze column types — enums become dictionary-encoded Parquet columns;
+# nullable ids are pinned to string so an all-NULL batch keeps its type
+_BRONZE_DTYPES = {
+    "customer_id": "string",
+    "event_type":  "category",
+    "product_id":  "string",
+}
+
+# Event types that reference a product page
+_PRODUCT_EVENT_TYPES = ["browse", "add_to_cart", "checkout"]
+
 
 # --------------------------------------------------------------------------
-# Row builder
+# Batch builder
 # --------------------------------------------------------------------------
 
-def _make_row(session_id: str) -> dict:
-    customer_id = f"CUST-{random.randint(1000, 9999)}"
-    event_type = random.choice(VALID_EVENT_TYPES)
+def _make_batch(n: int, session_ids: list[str], rng: np.random.Generator) -> pd.DataFrame:
+    """Build ``n`` clickstream events spread across ``session_ids``."""
+    customer_id = np.char.add("CUST-", rng.integers(1000, 10000, n).astype(str))
 
     # ~4% chance: invalid event type  (Silver will flag this)
-    if random.random() < 0.04:
-        event_type = "UNKNOWN"
+    event_type = np.where(rng.random(n) < 0.04, "UNKNOWN", rng.choice(VALID_EVENT_TYPES, n))
 
     # ~3% chance: NULL customer_id  (Silver will flag as invalid)
-    if random.random() < 0.03:
-        customer_id = None
+    customer_id = np.where(rng.random(n) < 0.03, None, customer_id)
+
+    product_id = np.where(np.isin(event_type, _PRODUCT_EVENT_TYPES), rng.choice(PRODUCT_IDS, n), None)
 
-    return {
-        "event_id":    str(uuid.uuid4()),
-        "timestamp":   (datetime.now(timezone.utc) - timedelta(seconds=random.randint(0, 60))).isoformat(),
+    # One clock read per batch; rows land up to 60s in the past
+    ts_ns = np.int64(time.time_ns()) - rng.integers(0, 60_000_000_000, n)
+
+    return pd.DataFrame({
+        "event_id":    random_hex_ids(n),
+        "timestamp":   pd.to_datetime(ts_ns, utc=True),
         "customer_id": customer_id,
-        "session_id":  session_id,
+        "session_id":  rng.choice(session_ids, n),
         "event_type":  event_type,
-        "product_id":  random.choice(PRODUCT_IDS) if event_type in ("browse", "add_to_cart", "checkout") else None,
-        "page_url":    random.choice(PAGES),
-        "device_type": random.choice(DEVICE_TYPES),
-    }
+        "product_id":  product_id,
+        "page_url":    rng.choice(PAGES, n),
+        "device_type": rng.choice(DEVICE_TYPES, n),
+    })
 
 
 # --------------------------------------------------------------------------
@@ -74,30 +87,24 @@ def _make_row(session_id: str) -> dict:
 
 def run() -> Path:
     """
-    Generate one batch of customer events, write a CSV to local_output/customer_events/,
-    then copy it to the Bronze layer.
+    Generate one batch of customer events and write it straight into the Bronze
+    layer as Parquet.
 
     Returns the destination Bronze path.
     """
-    output_dir = LOCAL_OUTPUT_DIR / "customer_events"
-    output_dir.mkdir(parents=True, exist_ok=True)
-
     # Generate events across a handful of concurrent sessions
-    session_ids = [str(uuid.uuid4()) for _ in range(3)]
-    rows = [_make_row(random.choice(session_ids)) for _ in range(CUSTOMER_EVENTS_ROWS_PER_BATCH)]
+    session_ids = list(random_hex_ids(3))
+    rng = np.random.default_rng()
+    df = _make_batch(CUSTOMER_EVENTS_ROWS_PER_BATCH, session_ids, rng)
 
     # ~5% chance: append a duplicate of the first row
-    if random.random() < 0.05 and rows:
-        rows.append(rows[0].copy())
+    if rng.random() < 0.05 and not df.empty:
+        df = pd.concat([df, df.iloc[[0]]], ignore_index=True)
 
-    df = pd.DataFrame(rows)
+    logger.info("[GENERATOR] customer_events: %d rows generated", len(df))
 
     ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-    local_file = output_dir / f"events_{ts}.csv"
-    df.to_csv(local_file, index=False)
-    logger.info("[GENERATOR] customer_events: %d rows → %s", len(df), local_file)
-
-    bronze_path = save_to_bronze("customer_events", local_file)
+    bronze_path = write_to_bronze("customer_events", df.astype(_BRONZE_DTYPES), f"events_{ts}.parquet")
     return bronze_path
 
 
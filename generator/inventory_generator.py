@@ -13,19 +13,18 @@ Intentional data-quality issues:
 """
 
 import logging
-import random
-import uuid
-from datetime import datetime, timedelta, timezone
+import time
+from datetime import datetime, timezone
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
-from faker import Faker
 
-from config import LOCAL_OUTPUT_DIR, INVENTORY_ROWS_PER_BATCH
-from storage.local_storage import save_to_bronze
+from config import INVENTORY_ROWS_PER_BATCH
+from generator._ids import random_hex_ids
+from storage.local_storage import write_to_bronze
 
 logger = logging.getLogger(__name__)
-fake = Faker()
 
 # --------------------------------------------------------------------------
 # Reference data
@@ -43,36 +42,52 @@ PRODUCT_CATALOGUE = [
     ("PROD-502", "Dumbbell"),      ("PROD-601", "Python Programming"),
 ]
 
+# Bronze column types — enums become dictionary-encoded Parquet columns;
+# nullable ids are pinned to string so an all-NULL batch keeps its type
+_BRONZE_DTYPES = {
+    "quantity":      "Int32",
+    "unit_cost":     "float32",
+    "movement_type": "category",
+    "supplier_id":   "string",
+}
+
+_CATALOGUE_IDS = np.array([pid for pid, _ in PRODUCT_CATALOGUE])
+_CATALOGUE_NAMES = np.array([name for _, name in PRODUCT_CATALOGUE])
+
 
 # --------------------------------------------------------------------------
-# Row builder
+# Batch builder
 # --------------------------------------------------------------------------
 
-def _make_row() -> dict:
-    product_id, product_name = random.choice(PRODUCT_CATALOGUE)
-    movement_type = random.choice(VALID_MOVEMENT_TYPES)
-    quantity = random.randint(1, 200)
-    unit_cost = round(random.uniform(1.0, 300.0), 2)
+def _make_batch(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Build ``n`` inventory movement rows in one shot as NumPy arrays."""
+    product_idx = rng.integers(0, len(PRODUCT_CATALOGUE), n)
+    quantity = rng.integers(1, 201, n)
+    unit_cost = np.round(rng.uniform(1.0, 300.0, n), 2)
 
     # ~4% chance: invalid movement type  (Silver will flag this)
-    if random.random() < 0.04:
-        movement_type = "TRANSFER"
+    movement_type = np.where(rng.random(n) < 0.04, "TRANSFER", rng.choice(VALID_MOVEMENT_TYPES, n))
 
     # ~3% chance: NULL or zero quantity  (Silver will flag as invalid)
-    if random.random() < 0.03:
-        quantity = None if random.random() < 0.5 else 0
-
-    return {
-        "movement_id":   str(uuid.uuid4()),
-        "timestamp":     (datetime.now(timezone.utc) - timedelta(seconds=random.randint(0, 120))).isoformat(),
-        "product_id":    product_id,
-        "product_name":  product_name,
-        "warehouse_id":  random.choice(WAREHOUSES),
+    bad_value = np.where(rng.random(n) < 0.5, np.nan, 0.0)
+    quantity = np.where(rng.random(n) < 0.03, bad_value, quantity)
+
+    supplier_id = np.where(movement_type == "inbound", rng.choice(SUPPLIERS, n), None)
+
+    # One clock read per batch; rows land up to 120s in the past
+    ts_ns = np.int64(time.time_ns()) - rng.integers(0, 120_000_000_000, n)
+
+    return pd.DataFrame({
+        "movement_id":   random_hex_ids(n),
+        "timestamp":     pd.to_datetime(ts_ns, utc=True),
+        "product_id":    _CATALOGUE_IDS[product_idx],
+        "product_name":  _CATALOGUE_NAMES[product_idx],
+        "warehouse_id":  rng.choice(WAREHOUSES, n),
         "movement_type": movement_type,
         "quantity":      quantity,
         "unit_cost":     unit_cost,
-        "supplier_id":   random.choice(SUPPLIERS) if movement_type == "inbound" else None,
-    }
+        "supplier_id":   supplier_id,
+    })
 
 
 # --------------------------------------------------------------------------
@@ -81,28 +96,22 @@ def _make_row() -> dict:
 
 def run() -> Path:
     """
-    Generate one batch of inventory movements, write a CSV to local_output/inventory/,
-    then copy it to the Bronze layer.
+    Generate one batch of inventory movements and write it straight into the Bronze
+    layer as Parquet.
 
     Returns the destination Bronze path.
     """
-    output_dir = LOCAL_OUTPUT_DIR / "inventory"
-    output_dir.mkdir(parents=True, exist_ok=True)
-
-    rows = [_make_row() for _ in range(INVENTORY_ROWS_PER_BATCH)]
+    rng = np.random.default_rng()
+    df = _make_batch(INVENTORY_ROWS_PER_BATCH, rng)
 
     # ~5% chance: append a duplicate of the first row
-    if random.random() < 0.05 and rows:
-        rows.append(rows[0].copy())
+    if rng.random() < 0.05 and not df.empty:
+        df = pd.concat([df, df.iloc[[0]]], ignore_index=True)
 
-    df = pd.DataFrame(rows)
+    logger.info("[GENERATOR] inventory: %d rows generated", len(df))
 
     ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-    local_file = output_dir / f"inventory_{ts}.csv"
-    df.to_csv(local_file, index=False)
-    logger.info("[GENERATOR] inventory: %d rows → %s", len(df), local_file)
-
-    bronze_path = save_to_bronze("inventory", local_file)
+    bronze_path = write_to_bronze("inventory", df.astype(_BRONZE_DTYPES), f"inventory_{ts}.parquet")
     return bronze_path
 
 
@@ -13,19 +13,18 @@ Intentional data-quality issues (for Silver cleaning):
 """
 
 import logging
-import random
-import uuid
-from datetime import datetime, timedelta, timezone
+import time
+from datetime import datetime, timezone
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
-from faker import Faker
 
-from config import LOCAL_OUTPUT_DIR, SALES_ROWS_PER_BATCH
-from storage.local_storage import save_to_bronze
+from config import SALES_ROWS_PER_BATCH
+from generator._ids import random_hex_ids
+from storage.local_storage import write_to_bronze
 
 logger = logging.getLogger(__name__)
-fake = Faker()
 
 # --------------------------------------------------------------------------
 # Reference data
@@ -49,47 +48,62 @@ PAYMENT_METHODS = ["credit_card", "debit_card", "paypal", "bank_transfer", "cryp
 # Weighted toward 'completed'
 STATUSES = ["completed", "completed", "completed", "pending", "refunded"]
 
-PRODUCT_ID_MAP: dict[str, str] = {}  # product_name → stable PROD-xxx id
+# Bronze column types — enums become dictionary-encoded Parquet columns
+_BRONZE_DTYPES = {
+    "quantity":       "Int32",
+    "unit_price":     "float32",
+    "total_amount":   "float32",
+    "category":       "category",
+    "payment_method": "category",
+}
 
+# product_name → stable PROD-xxx id, assigned once in name order
+PRODUCT_ID_MAP: dict[str, str] = {
+    name: f"PROD-{100 + i}"
+    for i, name in enumerate(sorted({p for ps in PRODUCTS.values() for p in ps}))
+}
 
-def _get_product_id(product_name: str) -> str:
-    if product_name not in PRODUCT_ID_MAP:
-        PRODUCT_ID_MAP[product_name] = f"PROD-{random.randint(100, 999)}"
-    return PRODUCT_ID_MAP[product_name]
+# Flattened product table: row i of category c lives at _CATEGORY_OFFSETS[c] + i
+_PRODUCT_NAMES = np.array([p for c in CATEGORIES for p in PRODUCTS[c]])
+_PRODUCT_IDS = np.array([PRODUCT_ID_MAP[p] for p in _PRODUCT_NAMES])
+_CATEGORY_SIZES = np.array([len(PRODUCTS[c]) for c in CATEGORIES])
+_CATEGORY_OFFSETS = np.concatenate(([0], np.cumsum(_CATEGORY_SIZES)[:-1]))
 
 
 # --------------------------------------------------------------------------
-# Row builder
+# Batch builder
 # --------------------------------------------------------------------------
 
-def _make_row() -> dict:
-    category = random.choice(CATEGORIES)
-    product = random.choice(PRODUCTS[category])
-    quantity = random.randint(1, 10)
-    unit_price = round(random.uniform(5.0, 500.0), 2)
-    total_amount = round(quantity * unit_price, 2)
+def _make_batch(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Build ``n`` sales rows in one shot as NumPy arrays."""
+    cat_idx = rng.integers(0, len(CATEGORIES), n)
+    product_idx = _CATEGORY_OFFSETS[cat_idx] + rng.integers(0, _CATEGORY_SIZES[cat_idx])
+    quantity = rng.integers(1, 11, n)
+    unit_price = np.round(rng.uniform(5.0, 500.0, n), 2)
 
     # ~5% chance: corrupt total_amount  (Silver will fix/flag this)
-    if random.random() < 0.05:
-        total_amount = round(total_amount * random.uniform(0.7, 1.3), 2)
+    factor = np.where(rng.random(n) < 0.05, rng.uniform(0.7, 1.3, n), 1.0)
+    total_amount = np.round(quantity * unit_price * factor, 2)
 
     # ~3% chance: NULL quantity  (Silver will flag as invalid)
-    if random.random() < 0.03:
-        quantity = None
-
-    return {
-        "sale_id":        str(uuid.uuid4()),
-        "timestamp":      (datetime.now(timezone.utc) - timedelta(seconds=random.randint(0, 30))).isoformat(),
-        "customer_id":    f"CUST-{random.randint(1000, 9999)}",
-        "product_id":     _get_product_id(product),
-        "product_name":   product,
-        "category":       category,
+    quantity = np.where(rng.random(n) < 0.03, np.nan, quantity)
+
+    # One clock read per batch; rows land up to 30s in the past
+    ts_ns = np.int64(time.time_ns()) - rng.integers(0, 30_000_000_000, n)
+
+    return pd.DataFrame({
+        "sale_id":        random_hex_ids(n),
+        "timestamp":      pd.to_datetime(ts_ns, utc=True),
+        "customer_id":    np.char.add("CUST-", rng.integers(1000, 10000, n).astype(str)),
+        "product_id":     _PRODUCT_IDS[product_idx],
+        "product_name":   _PRODUCT_NAMES[product_idx],
+        "category":       np.array(CATEGORIES)[cat_idx],
         "quantity":       quantity,
         "unit_price":     unit_price,
         "total_amount":   total_amount,
-        "payment_method": random.choice(PAYMENT_METHODS),
-        "status":         random.choice(STATUSES),
-    }
+        "payment_method": rng.choice(PAYMENT_METHODS, n),
+        "status":         rng.choice(STATUSES, n),
+    })
 
 
 # --------------------------------------------------------------------------
@@ -98,28 +112,22 @@ def _make_row() -> dict:
 
 def run() -> Path:
     """
-    Generate one batch of sales records, write a CSV to local_output/sales/,
-    then copy it to the Bronze layer.
+    Generate one batch of sales records and write it straight into the Bronze
+    layer as Parquet.
 
     Returns the destination Bronze path.
     """
-    output_dir = LOCAL_OUTPUT_DIR / "sales"
-    output_dir.mkdir(parents=True, exist_ok=True)
-
-    rows = [_make_row() for _ in range(SALES_ROWS_PER_BATCH)]
+    rng = np.random.default_rng()
+    df = _make_batch(SALES_ROWS_PER_BATCH, rng)
 
     # ~5% chance: append a duplicate of the first row
-    if random.random() < 0.05 and rows:
-        rows.append(rows[0].copy())
+    if rng.random() < 0.05 and not df.empty:
+        df = pd.concat([df, df.iloc[[0]]], ignore_index=True)
 
-    df = pd.DataFrame(rows)
+    logger.info("[GENERATOR] sales: %d rows generated", len(df))
 
     ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-    local_file = output_dir / f"sales_{ts}.csv"
-    df.to_csv(local_file, index=False)
-    logger.info("[GENERATOR] sales: %d rows → %s", len(df), local_file)
-
-    bronze_path = save_to_bronze("sales", local_file)
+    bronze_path = write_to_bronze("sales", df.astype(_BRONZE_DTYPES), f"sales_{ts}.parquet")
     return bronze_path
 
 
@@ -1,18 +1,23 @@
 """
 pipeline/bronze_to_silver.py
-Reads unprocessed Bronze CSV files for all 3 domains, applies domain-specific
+Reads unprocessed Bronze Parquet files for all 3 domains, applies domain-specific
 cleaning/validation, and writes cleaned Parquet files to the Silver layer.
 
 Called as a Airflow PythonOperator task.
 """
 
 import logging
-from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
 
 from config import DOMAINS
 from storage.local_storage import (
+    arrow_dtype,
     get_unprocessed_bronze_files,
     mark_bronze_files_processed,
     save_to_silver,
@@ -28,54 +33,146 @@ VALID_EVENT_TYPES   = {"login", "browse", "add_to_cart", "checkout", "logout"}
 VALID_MOVEMENT_TYPES = {"inbound", "outbound", "adjustment"}
 
 
+# ---------------------------------------------------------------------------
+# Bronze schemas (mirror the generators' Parquet output)
+# ---------------------------------------------------------------------------
+
+_UTC_TS = pa.timestamp("ns", tz="UTC")
+_ENUM   = pa.dictionary(pa.int8(), pa.string())
+
+# Every Bronze scan is cast to these, so no file's inferred schema (e.g. an
+# all-NULL column typed as null) can leak into the combined table
+BRONZE_SCHEMAS = {
+    "sales": pa.schema([
+        ("sale_id",        pa.string()),
+        ("timestamp",      _UTC_TS),
+        ("customer_id",    pa.string()),
+        ("product_id",     pa.string()),
+        ("product_name",   pa.string()),
+        ("category",       _ENUM),
+        ("quantity",       pa.int32()),
+        ("unit_price",     pa.float32()),
+        ("total_amount",   pa.float32()),
+        ("payment_method", _ENUM),
+        ("status",         pa.string()),
+    ]),
+    "customer_events": pa.schema([
+        ("event_id",    pa.string()),
+        ("timestamp",   _UTC_TS),
+        ("customer_id", pa.string()),
+        ("session_id",  pa.string()),
+        ("event_type",  _ENUM),
+        ("product_id",  pa.string()),
+        ("page_url",    pa.string()),
+        ("device_type", pa.string()),
+    ]),
+    "inventory": pa.schema([
+        ("movement_id",   pa.string()),
+        ("timestamp",     _UTC_TS),
+        ("product_id",    pa.string()),
+        ("product_name",  pa.string()),
+        ("warehouse_id",  pa.string()),
+        ("movement_type", _ENUM),
+        ("quantity",      pa.int32()),
+        ("unit_cost",     pa.float32()),
+        ("supplier_id",   pa.string()),
+    ]),
+}
+
+
+# ---------------------------------------------------------------------------
+# Validation helpers
+# ---------------------------------------------------------------------------
+
+def _first_per_key(table: pa.Table, key: str) -> pa.Table:
+    """
+    Keep the first row for each ``key`` value (NULL keys count as one value,
+    as with drop_duplicates). Keys are hashed by Arrow over the UTF-8
+    buffers, so this runs before the table is converted to pandas.
+    """
+    rows = pa.table({key: table[key], "row": pa.array(np.arange(table.num_rows))})
+    first = rows.group_by(key, use_threads=False).aggregate([("row", "min")])
+    return table.take(np.sort(first["row_min"].to_numpy()))
+
+
+def _null_checks(df: pd.DataFrame, required_cols: list[str]) -> list[tuple[np.ndarray, str]]:
+    """Return one (mask, flag) rule per required column from a single isna() pass."""
+    null_mat = df[required_cols].isna().to_numpy()
+    return [(null_mat[:, i], f"null_{col}") for i, col in enumerate(required_cols)]
+
+
+def _invalid_enum(values: pd.Series, allowed: set[str]) -> np.ndarray:
+    """
+    Flag non-NULL values outside ``allowed``.
+
+    The membership test runs once per distinct value on the categorical's
+    dictionary and is mapped back to rows through its integer codes (Bronze
+    enums already arrive dictionary-encoded, so the cast is usually a no-op).
+    """
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype("category")
+    bad = ~values.cat.categories.isin(list(allowed))
+    # Code -1 (NULL) indexes the trailing False
+    return np.append(bad, False)[values.cat.codes.to_numpy()]
+
+
+def _rule_flags(index: pd.Index, checks: list[tuple[np.ndarray, str]]) -> tuple[pd.DataFrame, np.ndarray]:
+    """
+    Turn (mask, flag) rule results into one boolean column per rule.
+
+    Also returns the is_valid bitmap, AND-ed with each rule's negation as the
+    flags are collected so no second pass over the flag columns is needed.
+    """
+    valid = np.ones(len(index), dtype=bool)
+    columns = {}
+    for mask, flag in checks:
+        columns[flag] = np.asarray(mask, dtype=bool)
+        valid &= ~columns[flag]
+    return pd.DataFrame(columns, index=index), valid
+
+
 # ---------------------------------------------------------------------------
 # Domain-specific transformations
 # ---------------------------------------------------------------------------
 
-def _process_sales(df: pd.DataFrame) -> pd.DataFrame:
+def _process_sales(table: pa.Table, processed_at: pd.Timestamp) -> pd.DataFrame:
     """
     Clean and validate fact_sales data.
 
     Rules:
-      1. Parse timestamp → UTC-aware datetime
-      2. Deduplicate on sale_id
-      3. Flag rows with NULL in any required column
-      4. For valid rows re-compute total_amount = quantity × unit_price
+      1. Deduplicate on sale_id
+      2. Flag rows with NULL in any required column
+      3. For valid rows re-compute total_amount = quantity × unit_price
          if the original value differs by > £0.01
-      5. Add is_valid, validation_errors, processed_at
+      4. Add is_valid, one null_<col> flag per required column, processed_at
     """
     required_cols = ["sale_id", "timestamp", "customer_id", "product_id",
                      "quantity", "unit_price", "total_amount"]
 
-    # 1. Parse timestamp
-    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, errors="coerce")
-
-    # 2. Deduplicate
-    before = len(df)
-    df = df.drop_duplicates(subset=["sale_id"])
-    logger.info("  [SALES]  deduplication removed %d rows", before - len(df))
-
-    # 3. Validate: collect per-row error messages
-    errors = pd.Series([""] * len(df), index=df.index)
-
-    nulls = df[required_cols].isnull()
-    for col in required_cols:
-        mask = nulls[col]
-        errors[mask] += f"NULL:{col}; "
-
-    # 4. For rows with quantity & unit_price present, fix/check total_amount
-    computable = df["quantity"].notna() & df["unit_price"].notna()
-    expected = (df.loc[computable, "quantity"] * df.loc[computable, "unit_price"]).round(2)
-    mismatch = (df.loc[computable, "total_amount"] - expected).abs() > 0.01
-    df.loc[computable & mismatch, "total_amount"] = expected[mismatch]
+    # 1. Deduplicate (in Arrow), then convert to pandas
+    df = _first_per_key(table, "sale_id").to_pandas(types_mapper=arrow_dtype)
+    logger.info("  [SALES]  deduplication removed %d rows", table.num_rows - len(df))
+
+    # 2. Validate: one boolean flag column per rule
+    flags, valid = _rule_flags(df.index, _null_checks(df, required_cols))
+
+    # 3. For rows with quantity & unit_price present, fix/check total_amount
+    #    (NaN propagates through expected, so incomputable rows never match)
+    q = df["quantity"].to_numpy(dtype="float64", na_value=np.nan)
+    p = df["unit_price"].to_numpy(dtype="float64", na_value=np.nan)
+    t = df["total_amount"].to_numpy(dtype="float64", na_value=np.nan)
+    expected = np.round(q * p, 2)
+    mismatch = np.isfinite(expected) & (np.abs(t - expected) > 0.01)
+    #    (stored back at the Bronze float32 width; Gold sums it in float64)
+    df["total_amount"] = np.where(mismatch, expected, t).astype(np.float32)
     n_fixed = int(mismatch.sum())
     if n_fixed:
         logger.info("  [SALES]  fixed total_amount on %d rows", n_fixed)
 
-    # 5. Finalise
-    df["is_valid"]         = errors.str.strip() == ""
-    df["validation_errors"] = errors.str.strip()
-    df["processed_at"]     = datetime.now(timezone.utc).isoformat()
+    # 4. Finalise
+    df["is_valid"]     = valid
+    df = pd.concat([df, flags], axis=1)
+    df["processed_at"] = processed_at
 
     valid_count = int(df["is_valid"].sum())
     logger.info(
@@ -85,40 +182,33 @@ def _process_sales(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def _process_customer_events(df: pd.DataFrame) -> pd.DataFrame:
+def _process_customer_events(table: pa.Table, processed_at: pd.Timestamp) -> pd.DataFrame:
     """
     Clean and validate fact_customer_events data.
 
     Rules:
-      1. Parse timestamp → UTC-aware datetime
-      2. Deduplicate on event_id
-      3. Flag rows with NULL in required columns
-      4. Flag rows with unrecognised event_type
-      5. Add is_valid, validation_errors, processed_at
+      1. Deduplicate on event_id
+      2. Flag rows with NULL in required columns
+      3. Flag rows with unrecognised event_type
+      4. Add is_valid, the per-rule flag columns, processed_at
     """
     required_cols = ["event_id", "timestamp", "customer_id", "session_id", "event_type"]
 
-    # 1. Parse timestamp
-    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, errors="coerce")
+    # 1. Deduplicate (in Arrow), then convert to pandas
+    df = _first_per_key(table, "event_id").to_pandas(types_mapper=arrow_dtype)
+    logger.info("  [EVENTS] deduplication removed %d rows", table.num_rows - len(df))
 
-    # 2. Deduplicate
-    before = len(df)
-    df = df.drop_duplicates(subset=["event_id"])
-    logger.info("  [EVENTS] deduplication removed %d rows", before - len(df))
+    # 2 & 3. Validate
+    checks = _null_checks(df, required_cols)
 
-    # 3 & 4. Validate
-    errors = pd.Series([""] * len(df), index=df.index)
+    invalid_enum = _invalid_enum(df["event_type"], VALID_EVENT_TYPES)
+    checks.append((invalid_enum, "invalid_event_type"))
 
-    nulls = df[required_cols].isnull()
-    for col in required_cols:
-        errors[nulls[col]] += f"NULL:{col}; "
+    flags, valid = _rule_flags(df.index, checks)
 
-    invalid_enum = ~df["event_type"].isin(VALID_EVENT_TYPES) & df["event_type"].notna()
-    errors[invalid_enum] += "INVALID_EVENT_TYPE; "
-
-    df["is_valid"]         = errors.str.strip() == ""
-    df["validation_errors"] = errors.str.strip()
-    df["processed_at"]     = datetime.now(timezone.utc).isoformat()
+    df["is_valid"]     = valid
+    df = pd.concat([df, flags], axis=1)
+    df["processed_at"] = processed_at
 
     valid_count = int(df["is_valid"].sum())
     logger.info(
@@ -128,45 +218,38 @@ def _process_customer_events(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def _process_inventory(df: pd.DataFrame) -> pd.DataFrame:
+def _process_inventory(table: pa.Table, processed_at: pd.Timestamp) -> pd.DataFrame:
     """
     Clean and validate fact_inventory_movements data.
 
     Rules:
-      1. Parse timestamp → UTC-aware datetime
-      2. Deduplicate on movement_id
-      3. Flag rows with NULL in required columns
-      4. Flag invalid movement_type
-      5. Flag zero / negative quantity
-      6. Add is_valid, validation_errors, processed_at
+      1. Deduplicate on movement_id
+      2. Flag rows with NULL in required columns
+      3. Flag invalid movement_type
+      4. Flag zero / negative quantity
+      5. Add is_valid, the per-rule flag columns, processed_at
     """
     required_cols = ["movement_id", "timestamp", "product_id",
                      "warehouse_id", "movement_type", "quantity"]
 
-    # 1. Parse timestamp
-    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, errors="coerce")
-
-    # 2. Deduplicate
-    before = len(df)
-    df = df.drop_duplicates(subset=["movement_id"])
-    logger.info("  [INV]    deduplication removed %d rows", before - len(df))
-
-    # 3, 4, 5. Validate
-    errors = pd.Series([""] * len(df), index=df.index)
+    # 1. Deduplicate (in Arrow), then convert to pandas
+    df = _first_per_key(table, "movement_id").to_pandas(types_mapper=arrow_dtype)
+    logger.info("  [INV]    deduplication removed %d rows", table.num_rows - len(df))
 
-    nulls = df[required_cols].isnull()
-    for col in required_cols:
-        errors[nulls[col]] += f"NULL:{col}; "
+    # 2, 3, 4. Validate
+    checks = _null_checks(df, required_cols)
 
-    invalid_type = ~df["movement_type"].isin(VALID_MOVEMENT_TYPES) & df["movement_type"].notna()
-    errors[invalid_type] += "INVALID_MOVEMENT_TYPE; "
+    invalid_type = _invalid_enum(df["movement_type"], VALID_MOVEMENT_TYPES)
+    checks.append((invalid_type, "invalid_movement_type"))
 
     bad_qty = df["quantity"].notna() & (pd.to_numeric(df["quantity"], errors="coerce") <= 0)
-    errors[bad_qty] += "NON_POSITIVE_QUANTITY; "
+    checks.append((bad_qty, "non_positive_quantity"))
 
-    df["is_valid"]         = errors.str.strip() == ""
-    df["validation_errors"] = errors.str.strip()
-    df["processed_at"]     = datetime.now(timezone.utc).isoformat()
+    flags, valid = _rule_flags(df.index, checks)
+
+    df["is_valid"]     = valid
+    df = pd.concat([df, flags], axis=1)
+    df["processed_at"] = processed_at
 
     valid_count = int(df["is_valid"].sum())
     logger.info(
@@ -183,36 +266,68 @@ _PROCESSORS = {
 }
 
 
+def _scan(domain: str, files: list[Path]) -> pa.Table:
+    dataset = ds.dataset([str(f) for f in files], format="parquet", schema=BRONZE_SCHEMAS[domain])
+    return dataset.to_table()
+
+
+def _read_bronze(domain: str, files: list[Path]) -> pa.Table | None:
+    """
+    Scan every new Bronze file of a domain into one Arrow table. If the
+    combined scan fails, each file is read on its own so a corrupt file is
+    logged and dropped instead of failing the whole domain (None if no file
+    is readable).
+    """
+    try:
+        return _scan(domain, files)
+    except Exception as e:
+        logger.warning("[%s] Bronze scan failed, retrying file by file: %s", domain, e)
+
+    tables = []
+    for f in files:
+        try:
+            tables.append(_scan(domain, [f]))
+        except Exception as e:
+            logger.error("[%s] Failed to read %s: %s", domain, f.name, e)
+    return pa.concat_tables(tables) if tables else None
+
+
 # ---------------------------------------------------------------------------
 # Public entry point (Airflow PythonOperator)
 # ---------------------------------------------------------------------------
 
 def run() -> None:
     """
-    For each domain, read unprocessed Bronze CSVs → clean → write Silver Parquet.
+    For each domain, read unprocessed Bronze Parquet → clean → write Silver Parquet.
     Idempotent: bronze files already processed are skipped.
     """
     logger.info("=== Bronze → Silver pipeline started ===")
 
+    pending = {}
     for domain in DOMAINS:
         files = get_unprocessed_bronze_files(domain)
-        if not files:
+        if files:
+            pending[domain] = files
+        else:
             logger.info("[%s] No new bronze files to process.", domain)
-            continue
 
-        logger.info("[%s] Processing %d new bronze file(s)...", domain, len(files))
-        dfs = []
-        for f in files:
-            try:
-                dfs.append(pd.read_csv(f))
-            except Exception as e:
-                logger.error("[%s] Failed to read %s: %s", domain, f.name, e)
-
-        if not dfs:
+    # Domain scans are independent and mostly I/O wait — overlap them
+    with ThreadPoolExecutor(max_workers=len(DOMAINS)) as pool:
+        tables = dict(zip(pending, pool.map(_read_bronze, pending, pending.values())))
+
+    # One typed timestamp for the whole run; Parquet dictionary-encodes the constant
+    processed_at = pd.Timestamp.now(tz="UTC")
+
+    for domain, files in pending.items():
+        table = tables[domain]
+        if table is None:
+            # Nothing readable — mark the batch anyway so it is not retried forever
+            logger.error("[%s] No readable bronze files in this batch; skipping.", domain)
+            mark_bronze_files_processed(domain, files)
             continue
 
-        combined = pd.concat(dfs, ignore_index=True)
-        cleaned  = _PROCESSORS[domain](combined)
+        logger.info("[%s] Processing %d new bronze file(s)...", domain, len(files))
+        cleaned = _PROCESSORS[domain](table, processed_at)
         save_to_silver(domain, cleaned)
         mark_bronze_files_processed(domain, files)
 
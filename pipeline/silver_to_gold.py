@@ -1,6 +1,6 @@
 """
 pipeline/silver_to_gold.py
-Reads all Silver Parquet data for each domain and produces 3 Gold aggregate tables:
+Reads new Silver Parquet data for each domain and refreshes 3 Gold aggregate tables:
 
   1. gold/daily_sales_summary      — daily revenue KPIs + category breakdown
   2. gold/customer_activity_summary — daily event counts by type + device
@@ -10,80 +10,223 @@ Called as an Airflow PythonOperator task (runs after bronze_to_silver).
 """
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
 import pandas as pd
-
-from storage.local_storage import read_from_silver, save_to_gold
+import pyarrow as pa
+import pyarrow.acero as acero
+import pyarrow.compute as pc
+
+from storage.local_storage import (
+    arrow_dtype,
+    get_unprocessed_silver_files,
+    group_silver_files_by_date,
+    mark_silver_files_processed,
+    read_silver_table,
+    save_to_gold,
+    silver_partition_files,
+)
 
 logger = logging.getLogger(__name__)
 
+# ---------------------------------------------------------------------------
+# Silver columns each builder reads (projected and cast at scan time)
+# ---------------------------------------------------------------------------
+
+_UTC_TS = pa.timestamp("ns", tz="UTC")
+_ENUM   = pa.dictionary(pa.int8(), pa.string())     # already dictionary-encoded in Silver
+_CODES  = pa.dictionary(pa.int32(), pa.string())    # read from the Parquet dictionary pages
+
+# Fixed read schemas, so every Silver file — including ones written by older
+# releases with plain-string enums or float64 amounts — scans to the same types
+# and the per-partition base aggregates always concatenate. Numerics are read
+# at the widest width any release wrote (sums accumulate in 64 bits anyway).
+# Id columns and string group keys are read as dictionaries, so the
+# aggregator hashes codes.
+SALES_SCHEMA = pa.schema([
+    ("is_valid",       pa.bool_()),
+    ("timestamp",      _UTC_TS),
+    ("total_amount",   pa.float64()),
+    ("sale_id",        _CODES),
+    ("customer_id",    _CODES),
+    ("category",       _ENUM),
+    ("unit_price",     pa.float64()),
+    ("payment_method", _ENUM),
+])
+EVENTS_SCHEMA = pa.schema([
+    ("is_valid",    pa.bool_()),
+    ("timestamp",   _UTC_TS),
+    ("event_type",  _ENUM),
+    ("event_id",    pa.string()),
+    ("customer_id", _CODES),
+    ("session_id",  _CODES),
+    ("device_type", _CODES),
+])
+INVENTORY_SCHEMA = pa.schema([
+    ("is_valid",      pa.bool_()),
+    ("timestamp",     _UTC_TS),
+    ("product_id",    _CODES),
+    ("product_name",  _CODES),
+    ("warehouse_id",  _CODES),
+    ("movement_type", _ENUM),
+    ("quantity",      pa.int64()),
+    ("unit_cost",     pa.float64()),
+    ("movement_id",   pa.string()),
+])
+
+# Id columns counted distinct — aggregated as their int codes
+SALES_ID_COLUMNS  = ["sale_id", "customer_id"]
+EVENTS_ID_COLUMNS = ["customer_id", "session_id"]
+
+# Grain of the inventory movement aggregate (product_name follows product_id)
+INVENTORY_KEYS = ["date", "product_id", "product_name", "warehouse_id", "movement_type"]
+
+
+# ---------------------------------------------------------------------------
+# Aggregation helpers
+# ---------------------------------------------------------------------------
+
+def _codes(col: pa.ChunkedArray) -> pa.ChunkedArray:
+    """The int codes of a (unified) dictionary column."""
+    return pa.chunked_array([chunk.indices for chunk in col.chunks], type=col.type.index_type)
+
+
+def _keyed(table: pa.Table, id_columns: list[str] | None = None) -> pa.Table:
+    """
+    Prepare a Silver table for aggregation and add an int32 (date32) UTC
+    ``date`` key column. Rows are not copied: invalid ones are filtered out
+    inside the aggregation plan (see _aggregate).
+
+    Dictionaries differ per Silver file, so they are unified here for the
+    hash aggregator. The dictionary-read ``id_columns`` are then replaced by
+    their int32 codes: distinct counts only need identity, and hashing
+    integers is much cheaper than hashing the id strings.
+    """
+    table = table.unify_dictionaries()
+    for name in id_columns or []:
+        table = table.set_column(table.schema.get_field_index(name), name, _codes(table[name]))
+    # Silver timestamps are UTC: drop the tz (metadata only) so the date32 cast
+    # is plain integer division rather than a per-value time zone lookup
+    utc = table["timestamp"].cast(pa.timestamp("ns"))
+    return table.append_column("date", pc.cast(utc, pa.date32()))
+
+
+def _aggregate(
+    table: pa.Table,
+    keys: list[str],
+    aggs: dict[str, tuple[str, str]],
+    where: pc.Expression | None = None,
+) -> pa.Table:
+    """
+    GROUP BY ``keys`` in Arrow's hash aggregator, computing every aggregate in
+    one pass. ``aggs`` maps output column → (input column, Arrow function).
+
+    Runs as an Acero plan; with ``where`` set, rows stream through a filter
+    node into the aggregator, so the filtered subset is never materialized.
+    """
+    plan = [acero.Declaration("table_source", acero.TableSourceNodeOptions(table))]
+    if where is not None:
+        plan.append(acero.Declaration("filter", acero.FilterNodeOptions(where)))
+    plan.append(acero.Declaration("aggregate", acero.AggregateNodeOptions(
+        [(col, f"hash_{fn}", None, out) for out, (col, fn) in aggs.items()],
+        keys=keys,
+    )))
+    return acero.Declaration.from_sequence(plan).to_table().select(keys + list(aggs))
+
+
+def _to_frame(table: pa.Table, keys: list[str]) -> pd.DataFrame:
+    """Convert a (small) grouped table to pandas, ordered by its keys."""
+    df = table.to_pandas(types_mapper=arrow_dtype)
+    for key in keys:
+        # Dictionary keys arrive in first-seen order; sort by value, not code
+        if isinstance(df[key].dtype, pd.CategoricalDtype):
+            df[key] = df[key].cat.reorder_categories(df[key].cat.categories.sort_values())
+    return df.sort_values(keys, ignore_index=True)
+
+
+def _rollup(
+    base: pa.Table,
+    keys: list[str],
+    sums: dict[str, str],
+    distincts: dict[str, str] | None = None,
+) -> pd.DataFrame:
+    """
+    Re-group a fine-grained ``base`` aggregate by a subset of its keys.
+
+    ``sums`` (output → base column) are additive and summed directly.
+    Distinct counts are not, so ``distincts`` (output → base column of
+    per-group ``distinct`` lists) are flattened and counted again; those
+    lists are far shorter than the Silver rows they came from. The lists
+    hold id codes, which are only comparable within one date partition —
+    every rollup key includes ``date``, so codes never mix across days.
+    """
+    df = _to_frame(_aggregate(base, keys, {out: (col, "sum") for out, col in sums.items()}), keys)
+    for out, list_col in (distincts or {}).items():
+        values = base[list_col]
+        exploded = base.select(keys).take(pc.list_parent_indices(values))
+        exploded = exploded.append_column(list_col, pc.list_flatten(values))
+        counts = _to_frame(_aggregate(exploded, keys, {out: (list_col, "count_distinct")}), keys)
+        df = df.merge(counts, on=keys, how="left")
+    return df
+
 
 # ---------------------------------------------------------------------------
 # Gold Table 1 — daily_sales_summary
 # ---------------------------------------------------------------------------
 
-def _build_daily_sales_summary(df: pd.DataFrame) -> None:
+def _sales_base(table: pa.Table) -> pa.Table:
+    """
+    Aggregate one date partition of Silver sales at the finest grain all three
+    sales tables share. A sale_id has one category and one payment method,
+    so distinct order counts stay additive across the rollups.
+    """
+    return _aggregate(_keyed(table, SALES_ID_COLUMNS), ["date", "category", "payment_method"], {
+        "revenue":        ("total_amount", "sum"),
+        "amount_count":   ("total_amount", "count"),
+        "orders":         ("sale_id",      "count_distinct"),
+        "unit_price_sum": ("unit_price",   "sum"),
+        "unit_price_n":   ("unit_price",   "count"),
+        "customers":      ("customer_id",  "distinct"),
+    }, where=pc.field("is_valid"))
+
+
+def _build_daily_sales_summary(base: pa.Table, dates: pa.Array, generated_at: str) -> None:
     """
-    Input: Silver sales DataFrame (all valid + invalid rows present).
+    Input: base sales aggregate (see _sales_base) for the dates being rebuilt.
 
     Outputs two Gold tables:
       • daily_sales_summary   — per-day KPIs
       • category_sales_summary — per-day, per-category breakdown
     """
-    if df.empty:
-        logger.warning("[GOLD] sales silver is empty — skipping.")
-        return
-
-    valid = df[df["is_valid"] == True].copy()
-    if valid.empty:
+    if base.num_rows == 0:
         logger.warning("[GOLD] No valid sales rows — skipping.")
         return
 
-    valid["timestamp"] = pd.to_datetime(valid["timestamp"], utc=True, errors="coerce")
-    valid["date"] = valid["timestamp"].dt.date
-
     # ---- Daily KPIs ----
-    daily = (
-        valid.groupby("date")
-        .agg(
-            total_revenue=("total_amount", "sum"),
-            order_count=("sale_id", "nunique"),
-            avg_order_value=("total_amount", "mean"),
-            unique_customers=("customer_id", "nunique"),
-        )
-        .round(2)
-        .reset_index()
+    daily = _rollup(
+        base, ["date"],
+        sums={"total_revenue": "revenue", "order_count": "orders", "amount_count": "amount_count"},
+        distincts={"unique_customers": "customers"},
     )
-    daily["generated_at"] = datetime.now(timezone.utc).isoformat()
-    save_to_gold("daily_sales_summary", daily)
+    daily.insert(3, "avg_order_value", daily["total_revenue"] / daily.pop("amount_count"))
+    save_to_gold("daily_sales_summary", daily, dates, generated_at)
 
     # ---- Category breakdown ----
-    cat = (
-        valid.groupby(["date", "category"])
-        .agg(
-            category_revenue=("total_amount", "sum"),
-            category_orders=("sale_id", "nunique"),
-            avg_unit_price=("unit_price", "mean"),
-        )
-        .round(2)
-        .reset_index()
+    cat = _rollup(
+        base, ["date", "category"],
+        sums={"category_revenue": "revenue", "category_orders": "orders",
+              "unit_price_sum": "unit_price_sum", "unit_price_n": "unit_price_n"},
     )
-    cat["generated_at"] = datetime.now(timezone.utc).isoformat()
-    save_to_gold("category_sales_summary", cat)
+    cat["avg_unit_price"] = cat.pop("unit_price_sum") / cat.pop("unit_price_n")
+    save_to_gold("category_sales_summary", cat, dates, generated_at)
 
     # ---- Payment method breakdown ----
-    pay = (
-        valid.groupby(["date", "payment_method"])
-        .agg(
-            payment_revenue=("total_amount", "sum"),
-            payment_count=("sale_id", "nunique"),
-        )
-        .round(2)
-        .reset_index()
+    pay = _rollup(
+        base, ["date", "payment_method"],
+        sums={"payment_revenue": "revenue", "payment_count": "orders"},
     )
-    pay["generated_at"] = datetime.now(timezone.utc).isoformat()
-    save_to_gold("payment_method_summary", pay)
+    save_to_gold("payment_method_summary", pay, dates, generated_at)
 
     logger.info(
         "[GOLD] daily_sales_summary: %d day(s) | category_sales_summary: %d rows | payment_method_summary: %d rows",
@@ -95,50 +238,43 @@ def _build_daily_sales_summary(df: pd.DataFrame) -> None:
 # Gold Table 2 — customer_activity_summary
 # ---------------------------------------------------------------------------
 
-def _build_customer_activity_summary(df: pd.DataFrame) -> None:
+def _events_base(table: pa.Table) -> pa.Table:
+    """Aggregate one date partition of Silver customer events at the finest grain both event tables share."""
+    return _aggregate(_keyed(table, EVENTS_ID_COLUMNS), ["date", "event_type", "device_type"], {
+        "event_count": ("event_id",    "count"),
+        "customers":   ("customer_id", "distinct"),
+        "sessions":    ("session_id",  "distinct"),
+    }, where=pc.field("is_valid"))
+
+
+def _build_customer_activity_summary(base: pa.Table, dates: pa.Array, generated_at: str) -> None:
     """
-    Input: Silver customer_events DataFrame.
+    Input: base customer_events aggregate (see _events_base) for the dates being rebuilt.
 
     Outputs two Gold tables:
       • customer_activity_summary — event counts by type per day
       • device_usage_summary      — session counts by device per day
     """
-    if df.empty:
-        logger.warning("[GOLD] customer_events silver is empty — skipping.")
-        return
-
-    valid = df[df["is_valid"] == True].copy()
-    if valid.empty:
+    if base.num_rows == 0:
         logger.warning("[GOLD] No valid customer event rows — skipping.")
         return
 
-    valid["timestamp"] = pd.to_datetime(valid["timestamp"], utc=True, errors="coerce")
-    valid["date"] = valid["timestamp"].dt.date
-
     # ---- Event type counts per day ----
-    events = (
-        valid.groupby(["date", "event_type"])
-        .agg(
-            event_count=("event_id", "count"),
-            unique_customers=("customer_id", "nunique"),
-            unique_sessions=("session_id", "nunique"),
-        )
-        .reset_index()
+    events = _rollup(
+        base, ["date", "event_type"],
+        sums={"event_count": "event_count"},
+        distincts={"unique_customers": "customers", "unique_sessions": "sessions"},
     )
-    events["generated_at"] = datetime.now(timezone.utc).isoformat()
-    save_to_gold("customer_activity_summary", events)
+    save_to_gold("customer_activity_summary", events, dates, generated_at)
 
     # ---- Device breakdown per day ----
-    devices = (
-        valid.groupby(["date", "device_type"])
-        .agg(
-            session_count=("session_id", "nunique"),
-            event_count=("event_id", "count"),
-        )
-        .reset_index()
+    devices = _rollup(
+        base, ["date", "device_type"],
+        sums={"event_count": "event_count"},
+        distincts={"session_count": "sessions"},
     )
-    devices["generated_at"] = datetime.now(timezone.utc).isoformat()
-    save_to_gold("device_usage_summary", devices)
+    devices.insert(2, "session_count", devices.pop("session_count"))
+    save_to_gold("device_usage_summary", devices, dates, generated_at)
 
     logger.info(
         "[GOLD] customer_activity_summary: %d rows | device_usage_summary: %d rows",
@@ -150,61 +286,60 @@ def _build_customer_activity_summary(df: pd.DataFrame) -> None:
 # Gold Table 3 — inventory_summary
 # ---------------------------------------------------------------------------
 
-def _build_inventory_summary(df: pd.DataFrame) -> None:
+def _inventory_base(table: pa.Table) -> pa.Table:
+    """
+    Aggregate one date partition of Silver inventory movements per
+    product/warehouse/type. product_name depends on product_id alone, so it
+    is not hashed as a group key: its codes ride along as a "one" aggregate
+    and are put back on the partition's (unified) dictionary afterwards.
+    """
+    keyed = _keyed(table)
+    names = keyed["product_name"]
+    keyed = keyed.set_column(keyed.schema.get_field_index("product_name"), "product_name", _codes(names))
+    base = _aggregate(keyed, ["date", "product_id", "warehouse_id", "movement_type"], {
+        "product_name":   ("product_name", "one"),
+        "total_quantity": ("quantity",     "sum"),
+        "total_cost":     ("unit_cost",    "sum"),
+        "movement_count": ("movement_id",  "count"),
+    }, where=pc.field("is_valid"))
+
+    dictionary = names.chunk(0).dictionary if names.num_chunks else pa.array([], pa.string())
+    product_name = pa.DictionaryArray.from_arrays(base["product_name"].combine_chunks(), dictionary)
+    base = base.set_column(base.schema.get_field_index("product_name"), "product_name", product_name)
+    return base.select(INVENTORY_KEYS + ["total_quantity", "total_cost", "movement_count"])
+
+
+def _build_inventory_summary(base: pa.Table, dates: pa.Array, generated_at: str) -> None:
     """
-    Input: Silver inventory_movements DataFrame.
+    Input: base inventory aggregate (see _inventory_base) for the dates being rebuilt.
 
     Outputs:
       • inventory_movement_summary — daily inbound / outbound / adjustment qty per product + warehouse
       • inventory_net_position     — net stock position (inbound − outbound) per product + warehouse
     """
-    if df.empty:
-        logger.warning("[GOLD] inventory silver is empty — skipping.")
-        return
-
-    valid = df[df["is_valid"] == True].copy()
-    if valid.empty:
+    if base.num_rows == 0:
         logger.warning("[GOLD] No valid inventory rows — skipping.")
         return
 
-    valid["timestamp"] = pd.to_datetime(valid["timestamp"], utc=True, errors="coerce")
-    valid["date"] = valid["timestamp"].dt.date
-    valid["quantity"] = pd.to_numeric(valid["quantity"], errors="coerce")
-
     # ---- Movement breakdown per product/warehouse/type ----
-    movement = (
-        valid.groupby(["date", "product_id", "product_name", "warehouse_id", "movement_type"])
-        .agg(
-            total_quantity=("quantity", "sum"),
-            total_cost=("unit_cost", "sum"),
-            movement_count=("movement_id", "count"),
-        )
-        .round(2)
-        .reset_index()
-    )
-    movement["generated_at"] = datetime.now(timezone.utc).isoformat()
-    save_to_gold("inventory_movement_summary", movement)
+    movement = _to_frame(base, INVENTORY_KEYS)
+    save_to_gold("inventory_movement_summary", movement, dates, generated_at)
 
     # ---- Net position (inbound − outbound) per product/warehouse/day ----
+    #      unstacked from the movement aggregate, which already has one row
+    #      per key + movement_type, so no further summing is needed
+    keys = [k for k in INVENTORY_KEYS if k != "movement_type"]
     pivot = (
-        valid.pivot_table(
-            index=["date", "product_id", "product_name", "warehouse_id"],
-            columns="movement_type",
-            values="quantity",
-            aggfunc="sum",
-            fill_value=0,
-        )
+        movement.set_index(INVENTORY_KEYS)["total_quantity"]
+        .unstack("movement_type", fill_value=0)
         .reset_index()
+        # unstack orders columns by dictionary code; pin a stable schema that
+        # also has every movement type even if one never appeared
+        .reindex(columns=[*keys, "adjustment", "inbound", "outbound"], fill_value=0)
     )
-    # Ensure all columns exist even if a movement_type never appeared
-    for col in ("inbound", "outbound", "adjustment"):
-        if col not in pivot.columns:
-            pivot[col] = 0
-
     pivot["net_position"] = pivot["inbound"] - pivot["outbound"]
-    pivot["generated_at"] = datetime.now(timezone.utc).isoformat()
     pivot.columns.name = None          # remove pandas MultiIndex name artefact
-    save_to_gold("inventory_net_position", pivot)
+    save_to_gold("inventory_net_position", pivot, dates, generated_at)
 
     logger.info(
         "[GOLD] inventory_movement_summary: %d rows | inventory_net_position: %d rows",
@@ -212,25 +347,77 @@ def _build_inventory_summary(df: pd.DataFrame) -> None:
     )
 
 
+# ---------------------------------------------------------------------------
+# Per-domain dispatch
+# ---------------------------------------------------------------------------
+
+# domain → (Silver read schema, per-partition base aggregate, Gold builder)
+GOLD_BUILDS = {
+    "sales":           (SALES_SCHEMA,     _sales_base,     _build_daily_sales_summary),
+    "customer_events": (EVENTS_SCHEMA,    _events_base,    _build_customer_activity_summary),
+    "inventory":       (INVENTORY_SCHEMA, _inventory_base, _build_inventory_summary),
+}
+
+
+def _dispatch(domain: str, generated_at: str) -> None:
+    """
+    Rebuild one domain's Gold tables for the Silver dates that received new
+    files since the last run.
+
+    Silver is partitioned by event date and every Gold table is keyed by
+    date, so re-reading the touched date partitions in full gives exact
+    aggregates (distinct counts included) for those dates; all other dates
+    are carried over from the previous Gold snapshot by save_to_gold.
+
+    Partitions are streamed one at a time: each is read and reduced to its
+    small base aggregate before the next is loaded, so peak memory is one
+    day of projected Silver however many days are rebuilt.
+    """
+    new_files = get_unprocessed_silver_files(domain)
+    if not new_files:
+        logger.info("[GOLD] %s: no new silver files.", domain)
+        return
+
+    # Rows without a timestamp are never valid, so the undated partition has
+    # nothing to aggregate
+    new_by_date, _ = group_silver_files_by_date(new_files)
+    if not new_by_date:
+        mark_silver_files_processed(domain, new_files)
+        return
+    logger.info("[GOLD] %s: %d new silver file(s) → rebuilding %d date partition(s)",
+                domain, len(new_files), len(new_by_date))
+
+    schema, aggregate_base, build = GOLD_BUILDS[domain]
+    bases = [
+        aggregate_base(read_silver_table(domain, schema, files=silver_partition_files(domain, day)))
+        for day in new_by_date
+    ]
+    dates = pa.array(list(new_by_date), pa.date32())
+    build(pa.concat_tables(bases).unify_dictionaries(), dates, generated_at)
+    mark_silver_files_processed(domain, new_files)
+
+
 # ---------------------------------------------------------------------------
 # Public entry point (Airflow PythonOperator)
 # ---------------------------------------------------------------------------
 
 def run() -> None:
     """
-    Read all Silver data for each domain and produce Gold aggregate tables.
-    Produces a full snapshot on every run (idempotent — overwrites nothing,
-    simply appends a new timestamped Parquet file).
+    Incrementally refresh the Gold aggregate tables from new Silver data.
+    Each refreshed table gets a new full timestamped snapshot file (nothing
+    is overwritten); tables whose domain had no new Silver files are left as is.
     """
     logger.info("=== Silver → Gold pipeline started ===")
 
-    sales_df   = read_from_silver("sales")
-    events_df  = read_from_silver("customer_events")
-    inv_df     = read_from_silver("inventory")
+    # One generation time for every table written by this run
+    generated_at = datetime.now(timezone.utc).isoformat()
 
-    _build_daily_sales_summary(sales_df)
-    _build_customer_activity_summary(events_df)
-    _build_inventory_summary(inv_df)
+    # Domains share no state and their Arrow reads/aggregations release the
+    # GIL — build them concurrently
+    with ThreadPoolExecutor(max_workers=len(GOLD_BUILDS)) as pool:
+        futures = [pool.submit(_dispatch, domain, generated_at) for domain in GOLD_BUILDS]
+    for future in futures:
+        future.result()
 
     logger.info("=== Silver → Gold pipeline complete ===")
 
@@ -5,23 +5,31 @@ of the local filesystem-based data lake.
 
 Directory layout (Hive-style partitioning):
   datalake/
-    bronze/<domain>/year=YYYY/month=MM/day=DD/<file>.csv
-    silver/<domain>/year=YYYY/month=MM/day=DD/<file>.parquet
+    bronze/<domain>/year=YYYY/month=MM/day=DD/<file>.parquet
+    silver/<domain>/year=YYYY/month=MM/day=DD/<file>.parquet   (partitioned by event date)
     gold/<table_name>/<file>.parquet
 
-State tracking (incremental Silver processing):
-  .state/<domain>_processed.json  — list of bronze file paths already processed
+State tracking (incremental processing):
+  .state/<domain>_bronze_manifest.txt   — append-only list of every bronze file written
+  .state/<domain>_processed.parquet     — manifest of bronze paths already processed
+  .state/<domain>_gold_processed.json   — silver paths already aggregated into Gold
 """
 
-import json
 import logging
+import os
 import shutil
-from datetime import datetime, timezone
+import tempfile
+from datetime import date, datetime, timezone
 from pathlib import Path
 
+import orjson
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 
-from config import DATALAKE_DIR, STATE_DIR
+from config import DATALAKE_DIR, LOCAL_OUTPUT_DIR, STATE_DIR, WRITE_LOCAL_OUTPUT
 
 logger = logging.getLogger(__name__)
 
@@ -45,23 +53,64 @@ def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
+def _bronze_dest(domain: str, filename: str) -> Path:
+    """Return today's Hive-partitioned Bronze path for ``filename``, creating its directory."""
+    dest_dir = _hive_path(DATALAKE_DIR / "bronze", domain, _utcnow())
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    return dest_dir / filename
+
+
+def arrow_dtype(arrow_type: pa.DataType) -> pd.ArrowDtype | None:
+    """
+    types_mapper for Arrow → pandas conversions: keep columns Arrow-backed,
+    except dictionary-encoded enums which stay pandas categoricals (ArrowDtype
+    dictionaries do not round-trip through Parquet pandas metadata).
+    """
+    if pa.types.is_dictionary(arrow_type):
+        return None
+    return pd.ArrowDtype(arrow_type)
+
+
 # ---------------------------------------------------------------------------
 # Bronze Layer
 # ---------------------------------------------------------------------------
 
+def write_to_bronze(domain: str, df: pd.DataFrame, filename: str) -> Path:
+    """
+    Write a generator batch straight into the Bronze layer as snappy Parquet.
+
+    The file is written under a .tmp name and renamed into place, then
+    recorded in the domain's Bronze manifest, so Bronze listings never see a
+    partial file. With WRITE_LOCAL_OUTPUT enabled a copy is also kept in
+    local_output/<domain>/ for debugging.
+
+    Returns the destination path.
+    """
+    dest_file = _bronze_dest(domain, filename)
+    tmp_file = dest_file.with_name(dest_file.name + ".tmp")
+    df.to_parquet(tmp_file, engine="pyarrow", compression="snappy", index=False)
+    os.replace(tmp_file, dest_file)
+    _append_bronze_manifest(domain, dest_file)
+
+    if WRITE_LOCAL_OUTPUT:
+        local_dir = LOCAL_OUTPUT_DIR / domain
+        local_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(dest_file, local_dir / filename)
+
+    logger.info("[BRONZE] %-20s | %d rows → %s", domain, len(df), dest_file.relative_to(DATALAKE_DIR))
+    return dest_file
+
+
 def save_to_bronze(domain: str, source_file: Path) -> Path:
     """
-    Copy a raw CSV from local_output/<domain>/ into the Bronze layer
+    Copy an existing raw Parquet file (e.g. a backfill) into the Bronze layer
     with Hive-style partitioning. The raw file is preserved as-is.
 
     Returns the destination path.
     """
-    dt = _utcnow()
-    dest_dir = _hive_path(DATALAKE_DIR / "bronze", domain, dt)
-    dest_dir.mkdir(parents=True, exist_ok=True)
-
-    dest_file = dest_dir / source_file.name
+    dest_file = _bronze_dest(domain, source_file.name)
     shutil.copy2(source_file, dest_file)
+    _append_bronze_manifest(domain, dest_file)
 
     logger.info("[BRONZE] %-20s | %s → %s", domain, source_file.name, dest_file.relative_to(DATALAKE_DIR))
     return dest_file
@@ -71,85 +120,302 @@ def save_to_bronze(domain: str, source_file: Path) -> Path:
 # State tracking (incremental bronze → silver)
 # ---------------------------------------------------------------------------
 
+_MANIFEST_SCHEMA = pa.schema([("path", pa.string())])
+
+
+def _manifest_file(domain: str) -> Path:
+    return STATE_DIR / f"{domain}_processed.parquet"
+
+
 def _load_processed_state(domain: str) -> set:
-    STATE_DIR.mkdir(parents=True, exist_ok=True)
-    state_file = STATE_DIR / f"{domain}_processed.json"
+    state_file = _manifest_file(domain)
     if state_file.exists():
-        with open(state_file) as f:
-            return set(json.load(f))
+        return set(pq.read_table(state_file, columns=["path"])["path"].to_pylist())
     return set()
 
 
-def _save_processed_state(domain: str, processed: set) -> None:
+def _bronze_manifest_file(domain: str) -> Path:
+    return STATE_DIR / f"{domain}_bronze_manifest.txt"
+
+
+def _append_bronze_manifest(domain: str, dest_file: Path) -> None:
+    """
+    Record a file that has landed in Bronze. Each entry is one write in
+    append mode, so concurrent writers never interleave within a line.
+
+    The first write seeds the manifest with every Bronze file already on
+    disk, so files that predate it stay visible to the pipeline. The seed is
+    written to a temp file and hard-linked into place, so the manifest only
+    ever appears complete; if another writer links first, its seed wins and
+    ours is discarded.
+    """
     STATE_DIR.mkdir(parents=True, exist_ok=True)
-    state_file = STATE_DIR / f"{domain}_processed.json"
-    with open(state_file, "w") as f:
-        json.dump(sorted(processed), f, indent=2)
+    manifest = _bronze_manifest_file(domain)
+    if not manifest.exists():
+        existing = sorted((DATALAKE_DIR / "bronze" / domain).rglob("*.parquet"))
+        fd, tmp_name = tempfile.mkstemp(dir=STATE_DIR, prefix=manifest.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                fh.writelines(f"{f}\n" for f in existing if f != dest_file)
+            os.link(tmp_name, manifest)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp_name)
+    with open(manifest, "a", encoding="utf-8") as fh:
+        fh.write(f"{dest_file}\n")
 
 
 def get_unprocessed_bronze_files(domain: str) -> list[Path]:
-    """Return bronze CSV files not yet processed into Silver."""
-    bronze_dir = DATALAKE_DIR / "bronze" / domain
-    if not bronze_dir.exists():
-        return []
+    """
+    Return bronze Parquet files not yet processed into Silver.
+
+    Files are listed from the domain's Bronze manifest instead of walking the
+    whole partition tree; the walk is only a fallback until the first Bronze
+    write creates (and seeds) the manifest. Listed files that have since been
+    deleted are logged and skipped.
+    """
+    manifest = _bronze_manifest_file(domain)
+    if manifest.exists():
+        lines = manifest.read_text(encoding="utf-8").splitlines()
+        all_files = sorted({Path(line) for line in lines if line})
+    else:
+        bronze_dir = DATALAKE_DIR / "bronze" / domain
+        if not bronze_dir.exists():
+            return []
+        all_files = sorted(bronze_dir.rglob("*.parquet"))
     processed = _load_processed_state(domain)
-    all_files = sorted(bronze_dir.rglob("*.csv"))
-    return [f for f in all_files if str(f) not in processed]
+    pending = []
+    for f in all_files:
+        if str(f) in processed:
+            continue
+        # The manifest outlives deleted Bronze files; never hand those to the pipeline
+        if not f.exists():
+            logger.warning("[BRONZE] %-20s | %s is listed but missing — skipped", domain, f.name)
+            continue
+        pending.append(f)
+    return pending
 
 
 def mark_bronze_files_processed(domain: str, files: list[Path]) -> None:
-    """Mark a list of bronze files as processed."""
-    processed = _load_processed_state(domain)
-    processed.update(str(f) for f in files)
-    _save_processed_state(domain, processed)
+    """
+    Append a list of bronze files to the domain's processed manifest.
+    The manifest is rewritten via a temp file + rename, so a crash never
+    leaves it half-written.
+    """
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    state_file = _manifest_file(domain)
+    new = pa.table({"path": [str(f) for f in files]}, schema=_MANIFEST_SCHEMA)
+    if state_file.exists():
+        new = pa.concat_tables([pq.read_table(state_file, columns=["path"]), new])
+
+    tmp_file = state_file.with_name(state_file.name + ".tmp")
+    pq.write_table(new, tmp_file)
+    os.replace(tmp_file, state_file)
+
+
+# ---------------------------------------------------------------------------
+# State tracking (incremental silver → gold)
+# ---------------------------------------------------------------------------
+
+def _gold_state_file(domain: str) -> Path:
+    return STATE_DIR / f"{domain}_gold_processed.json"
+
+
+def _load_gold_state(domain: str) -> set:
+    state_file = _gold_state_file(domain)
+    if state_file.exists():
+        return set(orjson.loads(state_file.read_bytes()))
+    return set()
+
+
+def _save_gold_state(domain: str, paths: set) -> None:
+    """Rewrite the domain's Gold state via a temp file + rename."""
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    state_file = _gold_state_file(domain)
+    tmp_file = state_file.with_name(state_file.name + ".tmp")
+    tmp_file.write_bytes(orjson.dumps(sorted(paths), option=orjson.OPT_INDENT_2))
+    os.replace(tmp_file, state_file)
+
+
+def get_unprocessed_silver_files(domain: str) -> list[Path]:
+    """Return Silver Parquet files not yet aggregated into Gold."""
+    silver_dir = DATALAKE_DIR / "silver" / domain
+    if not silver_dir.exists():
+        return []
+    processed = _load_gold_state(domain)
+    all_files = sorted(silver_dir.rglob("*.parquet"))
+    return [f for f in all_files if str(f) not in processed]
+
+
+def mark_silver_files_processed(domain: str, files: list[Path]) -> None:
+    """Add a list of Silver files to the domain's Gold state."""
+    _save_gold_state(domain, _load_gold_state(domain) | {str(f) for f in files})
 
 
 # ---------------------------------------------------------------------------
 # Silver Layer
 # ---------------------------------------------------------------------------
 
-def save_to_silver(domain: str, df: pd.DataFrame) -> Path:
-    """Save a cleaned DataFrame as Parquet into the Silver layer."""
-    dt = _utcnow()
-    dest_dir = _hive_path(DATALAKE_DIR / "silver", domain, dt)
-    dest_dir.mkdir(parents=True, exist_ok=True)
+# Rows without a parseable timestamp go to the Hive default (undated) partition
+_SILVER_UNDATED = "__HIVE_DEFAULT_PARTITION__"
+
+# ZSTD-3 compresses ~10–30% better than the default snappy at similar decode speed
+_SILVER_WRITE_OPTIONS = {
+    "compression":       "zstd",
+    "compression_level": 3,
+    "use_dictionary":    True,
+    "data_page_size":    1_048_576,
+    "row_group_size":    50_000,
+}
 
+
+def save_to_silver(domain: str, df: pd.DataFrame) -> list[Path]:
+    """
+    Save a cleaned DataFrame as Parquet into the Silver layer.
+
+    Rows are Hive-partitioned by the date of their own ``timestamp`` (not the
+    run date), one file per partition, so readers can prune whole days.
+    Returns the written files, one per partition touched.
+
+    Each partition is written with pq.write_table rather than
+    pyarrow.dataset.write_dataset: the dataset writer leaves a native thread
+    behind that intermittently aborts the interpreter at exit.
+    """
+    dt = _utcnow()
+    # Normalise to timestamp[ns, UTC] so every Silver file stores the same
+    # native type and Gold never re-parses; unparseable values become NaT
+    # and land in the undated partition
+    ts = pd.to_datetime(df["timestamp"], utc=True, errors="coerce").astype("datetime64[ns, UTC]")
+    table = pa.Table.from_pandas(df.assign(timestamp=ts), preserve_index=False)
     filename = f"{domain}_{dt.strftime('%Y%m%d_%H%M%S')}.parquet"
-    dest_file = dest_dir / filename
-    df.to_parquet(dest_file, index=False)
+
+    written: list[Path] = []
+    silver_dir = DATALAKE_DIR / "silver"
+    for day, rows in df.groupby(ts.dt.floor("D"), dropna=False, sort=True).indices.items():
+        if pd.isna(day):
+            u = _SILVER_UNDATED
+            dest_dir = silver_dir / domain / f"year={u}" / f"month={u}" / f"day={u}"
+        else:
+            dest_dir = _hive_path(silver_dir, domain, day)
+        dest_dir.mkdir(parents=True, exist_ok=True)
+        dest_file = dest_dir / filename
+        pq.write_table(table.take(rows), dest_file, **_SILVER_WRITE_OPTIONS)
+        written.append(dest_file)
 
     valid_count = int(df["is_valid"].sum()) if "is_valid" in df.columns else len(df)
     logger.info(
-        "[SILVER] %-20s | %d rows (%d valid) → %s",
-        domain, len(df), valid_count, dest_file.relative_to(DATALAKE_DIR),
+        "[SILVER] %-20s | %d rows (%d valid) → %d file(s) under silver/%s",
+        domain, len(df), valid_count, len(written), domain,
     )
-    return dest_file
+    return written
 
 
-def read_from_silver(domain: str) -> pd.DataFrame:
-    """Read all Silver Parquet files for a domain into a single DataFrame."""
+def group_silver_files_by_date(files: list[Path]) -> tuple[dict[date, list[Path]], list[Path]]:
+    """
+    Group Silver ``files`` by the event date of their partition
+    (…/year=YYYY/month=MM/day=DD), in date order. Files in the undated
+    partition are returned separately.
+    """
+    by_date: dict[date, list[Path]] = {}
+    undated: list[Path] = []
+    for f in files:
+        parts = dict(part.split("=", 1) for part in f.parent.parts[-3:])
+        if parts["day"] == _SILVER_UNDATED:
+            undated.append(f)
+            continue
+        day = date(int(parts["year"]), int(parts["month"]), int(parts["day"]))
+        by_date.setdefault(day, []).append(f)
+    return dict(sorted(by_date.items())), undated
+
+
+def silver_partition_files(domain: str, day: date) -> list[Path]:
+    """Return every Silver file currently in ``day``'s partition."""
+    return sorted(_hive_path(DATALAKE_DIR / "silver", domain, day).glob("*.parquet"))
+
+
+def read_silver_table(
+    domain: str,
+    schema: pa.Schema | None = None,
+    files: list[Path] | None = None,
+) -> pa.Table:
+    """
+    Read the Silver dataset for a domain as one Arrow table.
+
+    One dataset scan over every file (or just ``files``). With ``schema``
+    set, the scan is projected to its columns and every file is cast to its
+    types, so files written by older releases read back identically;
+    dictionary-typed string columns are read straight from the Parquet
+    dictionary pages instead of being decoded to strings. Returns an empty
+    table when there is no data.
+    """
     silver_dir = DATALAKE_DIR / "silver" / domain
     if not silver_dir.exists():
-        return pd.DataFrame()
-    parquet_files = sorted(silver_dir.rglob("*.parquet"))
-    if not parquet_files:
-        return pd.DataFrame()
-    return pd.concat([pd.read_parquet(f) for f in parquet_files], ignore_index=True)
+        return pa.table({})
+    dictionary_columns = [f.name for f in schema or [] if pa.types.is_dictionary(f.type)]
+    fmt = ds.ParquetFileFormat(read_options={"dictionary_columns": dictionary_columns})
+    source = silver_dir if files is None else [str(f) for f in files]
+    dataset = ds.dataset(source, format=fmt, schema=schema)
+    if not dataset.files:
+        return pa.table({})
+    return dataset.to_table(use_threads=True)
 
 
 # ---------------------------------------------------------------------------
 # Gold Layer
 # ---------------------------------------------------------------------------
 
-def save_to_gold(table_name: str, df: pd.DataFrame) -> Path:
-    """Save an aggregated DataFrame as Parquet into the Gold layer."""
+# Gold tables are small aggregates: ZSTD-3 + dictionary-encoded keys keep them
+# compact, and column statistics give downstream readers min/max pruning
+_GOLD_WRITE_OPTIONS = {
+    "compression":       "zstd",
+    "compression_level": 3,
+    "use_dictionary":    True,
+    "write_statistics":  True,
+    "row_group_size":    256_000,
+}
+
+
+def _latest_gold_file(table_name: str) -> Path | None:
+    files = sorted((DATALAKE_DIR / "gold" / table_name).glob(f"{table_name}_*.parquet"))
+    return files[-1] if files else None
+
+
+def save_to_gold(
+    table_name: str,
+    df: pd.DataFrame,
+    replace_dates: pa.Array | None = None,
+    generated_at: str | None = None,
+) -> Path:
+    """
+    Save an aggregated DataFrame as Parquet into the Gold layer.
+
+    Every file is a full snapshot of the table. With ``replace_dates`` set,
+    ``df`` holds only those (rebuilt) dates and the rows for every other date
+    are carried over from the latest existing snapshot.
+
+    ``generated_at`` (default: now) is stored once in the file's schema
+    metadata — read it back with
+    ``pq.read_schema(path).metadata[b"generated_at"]``.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        b"generated_at": (generated_at or _utcnow().isoformat()).encode(),
+    })
+    previous = _latest_gold_file(table_name)
+    if replace_dates is not None and previous is not None:
+        kept = pq.read_table(previous).filter(~pc.field("date").isin(replace_dates))
+        kept = kept.select(table.column_names).cast(table.schema)
+        table = pa.concat_tables([kept, table]).sort_by("date")
+
     dt = _utcnow()
     dest_dir = DATALAKE_DIR / "gold" / table_name
     dest_dir.mkdir(parents=True, exist_ok=True)
 
     filename = f"{table_name}_{dt.strftime('%Y%m%d_%H%M%S')}.parquet"
     dest_file = dest_dir / filename
-    df.to_parquet(dest_file, index=False)
+    pq.write_table(table, dest_file, **_GOLD_WRITE_OPTIONS)
 
-    logger.info("[GOLD]   %-20s | %d rows → %s", table_name, len(df), dest_file.relative_to(DATALAKE_DIR))
+    logger.info("[GOLD]   %-20s | %d rows → %s", table_name, table.num_rows, dest_file.relative_to(DATALAKE_DIR))
     return dest_file